@@ -3,6 +3,7 @@
 Simple API Status Check - No embedding calls
 """
 
+import asyncio
 import os
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
@@ -11,67 +12,69 @@ import time
 load_dotenv()
 api_key = os.getenv("OPENAI_API_KEY")
 
-print("╔════════════════════════════════════════════════════════════╗")
-print("║           OPENAI API STATUS CHECK                         ║")
-print("╚════════════════════════════════════════════════════════════╝")
+# Constructed after the key check below: building the client with a missing
+# key raises, and a status script should report that, not die in a traceback
+llm = None
 
-print(f"\nAPI Key Status: {'✓ Found' if api_key else '✗ Missing'}")
-
-print("\n[TEST 1] Chat API - Simple message")
-print("─" * 60)
-try:
-    llm = ChatOpenAI(model="gpt-4o-mini", api_key=api_key, temperature=0)
-    start = time.time()
-    response = llm.invoke("Say 'working' in one word")
-    elapsed = time.time() - start
-    print(f"✓ SUCCESS - Response: {response.content}")
-    print(f"  Time: {elapsed:.2f}s")
-except Exception as e:
-    print(f"✗ FAILED: {str(e)[:150]}")
-
-print("\n[TEST 2] Chat API - Question answering")
-print("─" * 60)
-try:
-    llm = ChatOpenAI(model="gpt-4o-mini", api_key=api_key, temperature=0)
-    
-    prompt = """Based on this text, answer the question:
+# The three checks are independent network calls, so they run concurrently:
+# total wall time is the slowest request instead of the sum of all three
+TESTS = [
+    ("Chat API - Simple message", "Say 'working' in one word"),
+    ("Chat API - Question answering", """Based on this text, answer the question:
 
 Text: Parth Kumar is the CTO of GraphRAG Corporation. He works at DRC Systems.
 
 Question: What is Parth's job?
 
-Answer:"""
-    
-    start = time.time()
-    response = llm.invoke(prompt)
-    elapsed = time.time() - start
-    print(f"✓ SUCCESS")
-    print(f"  Answer: {response.content}")
-    print(f"  Time: {elapsed:.2f}s")
-except Exception as e:
-    print(f"✗ FAILED: {str(e)[:150]}")
-
-print("\n[TEST 3] Chat API - YES/NO question")
-print("─" * 60)
-try:
-    llm = ChatOpenAI(model="gpt-4o-mini", api_key=api_key, temperature=0)
-    
-    prompt = """Based on this text, answer YES or NO:
+Answer:"""),
+    ("Chat API - YES/NO question", """Based on this text, answer YES or NO:
 
 Text: Parth Kumar works at GraphRAG. He does NOT work at TechCorp anymore.
 
 Question: Does Parth still work at TechCorp?
 
-Answer (YES or NO):"""
-    
-    start = time.time()
-    response = llm.invoke(prompt)
-    elapsed = time.time() - start
-    print(f"✓ SUCCESS")
-    print(f"  Answer: {response.content}")
-    print(f"  Time: {elapsed:.2f}s")
-except Exception as e:
-    print(f"✗ FAILED: {str(e)[:150]}")
+Answer (YES or NO):"""),
+]
+
+
+async def run_test(prompt):
+    """Run one chat call and return (answer, elapsed seconds)"""
+    start = time.perf_counter()
+    response = await llm.ainvoke(prompt)
+    elapsed = time.perf_counter() - start
+    return response.content, elapsed
+
+
+async def main():
+    results = await asyncio.gather(
+        *(run_test(prompt) for _, prompt in TESTS),
+        return_exceptions=True,
+    )
+    for i, ((label, _), result) in enumerate(zip(TESTS, results), start=1):
+        print(f"\n[TEST {i}] {label}")
+        print("─" * 60)
+        if isinstance(result, Exception):
+            print(f"✗ FAILED: {str(result)[:150]}")
+        else:
+            answer, elapsed = result
+            print(f"✓ SUCCESS")
+            print(f"  Answer: {answer}")
+            print(f"  Time: {elapsed:.2f}s")
+
+
+print("╔════════════════════════════════════════════════════════════╗")
+print("║           OPENAI API STATUS CHECK                         ║")
+print("╚════════════════════════════════════════════════════════════╝")
+
+print(f"\nAPI Key Status: {'✓ Found' if api_key else '✗ Missing'}")
+
+if api_key:
+    # One client for all tests: constructing ChatOpenAI per call would open a
+    # fresh HTTP connection pool each time and lose keep-alive between requests
+    llm = ChatOpenAI(model="gpt-4o-mini", api_key=api_key, temperature=0)
+    asyncio.run(main())
+else:
+    print("\n✗ FAILED: Set OPENAI_API_KEY (e.g. in .env) and rerun; skipping API tests")
 
 print("\n" + "=" * 60)
 print("SUMMARY")
@@ -85,7 +88,7 @@ print("""
 NOTE: Embeddings API appears to be experiencing issues
   → This affects PDF uploads (semantic search)
   → But Chat API (queries) works fine
-  
+
 NEXT STEPS:
   1. Run main.py to use the system
   2. Try queries (Chat API works)
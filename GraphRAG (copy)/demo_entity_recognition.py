@@ -37,9 +37,9 @@ for idx, text in enumerate(test_sentences, 1):
     
     # spaCy timing
     recognizer_spacy = EntityRecognizer(use_method="spacy")
-    start = time.time()
+    start = time.perf_counter()
     entities_spacy = recognizer_spacy.extract_entities(text)
-    spacy_time = (time.time() - start) * 1000  # Convert to ms
+    spacy_time = (time.perf_counter() - start) * 1000  # Convert to ms
     
     print(f"\n[spaCy - {spacy_time:.1f}ms]")
     print(f"  Entities: {json.dumps(entities_spacy, indent=2)}")
@@ -47,9 +47,9 @@ for idx, text in enumerate(test_sentences, 1):
     # OpenAI timing
     print(f"\n[OpenAI - ~300-500ms (will be slower)]")
     recognizer_openai = EntityRecognizer(use_method="openai")
-    start = time.time()
+    start = time.perf_counter()
     entities_openai = recognizer_openai.extract_entities(text)
-    openai_time = (time.time() - start) * 1000
+    openai_time = (time.perf_counter() - start) * 1000
     
     print(f"  Entities: {json.dumps(entities_openai, indent=2)}")
     print(f"  Actual Time: {openai_time:.0f}ms")
@@ -3,15 +3,73 @@ Document Ingestion Module
 Handles adding documents to memory, creating relationships, and managing document storage
 """
 
-from memory_manager import split_document, add_chunk_memory, relate_chunks, print_relationships
+from memory_manager import split_document, add_chunk_memories, relate_chunk_pairs, print_relationships, memory_session
 from datetime import datetime
+from functools import partial
+import json
+import os
+
+try:
+    # Columnar storage loads via mmap instead of unpickling Python objects
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+try:
+    # C-accelerated JSON; 3-10x faster than the stdlib encoder
+    import orjson
+except ImportError:
+    orjson = None
+
+DOCUMENTS_META_PATH = "faiss_index/documents_meta.parquet"
+DOCUMENTS_META_JSON = "faiss_index/documents_meta.json"
+
+# Chunker specialized for the ingestion defaults (80-word chunks, 15-word
+# overlap) so keyword binding happens once instead of per document
+_split_for_ingest = partial(split_document, chunk_size=80, overlap=15)
 
 class DocumentIngestion:
     """Handles document ingestion and memory management"""
-    
+
     def __init__(self):
         self.documents = []
         self.document_count = 0
+        self._load_documents_meta()
+
+    def _load_documents_meta(self):
+        """Load persisted document metadata (Parquet if available, JSON fallback)"""
+        try:
+            if pq is not None and os.path.exists(DOCUMENTS_META_PATH):
+                self.documents = pq.read_table(DOCUMENTS_META_PATH, memory_map=True).to_pylist()
+            elif os.path.exists(DOCUMENTS_META_JSON):
+                if orjson is not None:
+                    with open(DOCUMENTS_META_JSON, 'rb') as f:
+                        self.documents = orjson.loads(f.read())
+                else:
+                    with open(DOCUMENTS_META_JSON) as f:
+                        self.documents = json.load(f)
+            if self.documents:
+                self.document_count = len(self.documents)
+                print(f"[LOAD] {self.document_count} document record(s) loaded")
+        except Exception as e:
+            print(f"[LOAD WARNING] Could not load document metadata: {e}")
+
+    def _save_documents_meta(self):
+        """Persist document metadata after each ingest"""
+        try:
+            os.makedirs(os.path.dirname(DOCUMENTS_META_PATH), exist_ok=True)
+            if pq is not None:
+                pq.write_table(pa.Table.from_pylist(self.documents), DOCUMENTS_META_PATH)
+            elif orjson is not None:
+                with open(DOCUMENTS_META_JSON, 'wb') as f:
+                    f.write(orjson.dumps(self.documents))
+            else:
+                with open(DOCUMENTS_META_JSON, 'w') as f:
+                    json.dump(self.documents, f)
+        except Exception as e:
+            print(f"[SAVE WARNING] Could not save document metadata: {e}")
     
     def add_document(self, document_text, source="document", metadata=None):
         """
@@ -35,23 +93,19 @@ class DocumentIngestion:
         print(f"[ADD DOCUMENT] Processing: {document_text[:50]}...")
         
         # Split document into chunks (larger chunks for better semantic understanding)
-        chunks = split_document(document_text, chunk_size=80, overlap=15)
+        chunks = _split_for_ingest(document_text)
         print(f"[CHUNKS] Split into {len(chunks)} chunks")
         
-        # Store chunks with metadata
-        for i, chunk in enumerate(chunks):
-            chunk_metadata = {
-                "doc_id": doc_id,
-                "chunk_index": i,
-                "timestamp": timestamp,
-                "source": source
-            }
-            add_chunk_memory(chunk, priority=1.0, source=source)
-        
-        # Create relationships between consecutive chunks
-        for i in range(len(chunks) - 1):
-            relate_chunks(chunks[i], chunks[i + 1], rel_type="NEXT")
-        
+        # One Neo4j session covers all of this document's writes
+        with memory_session() as session:
+            add_chunk_memories(chunks, priority=1.0, source=source, session=session)
+
+            # Create relationships between consecutive chunks in one batched
+            # write; repeated pairs (duplicate chunks in the same document)
+            # would just re-MERGE the same edge, so they are dropped up front
+            pairs = list(dict.fromkeys(zip(chunks, chunks[1:])))
+            relate_chunk_pairs(pairs, rel_type="NEXT", session=session)
+
         if len(chunks) > 1:
             print(f"[RELATIONSHIPS] Created {len(chunks)-1} sequential relationships")
         
@@ -65,11 +119,71 @@ class DocumentIngestion:
             "metadata": metadata
         }
         self.documents.append(doc_info)
-        
+        self._save_documents_meta()
+
         print(f"[SUCCESS] Document {doc_id} ingested with {len(chunks)} chunks")
         
         return doc_info
     
+    def add_document_stream(self, text_segments, source="document", metadata=None):
+        """
+        Ingest a document from an iterable of text segments with bounded memory
+
+        Each segment is chunked and written as soon as it arrives, so peak
+        memory stays proportional to segment size instead of file size.
+
+        Args:
+            text_segments (iterable): Cleaned text segments in document order
+            source (str): Source identifier for the document
+            metadata (dict): Additional metadata about the document
+
+        Returns:
+            dict: Information about the ingested document
+        """
+        self.document_count += 1
+        doc_id = f"{source}_{self.document_count}"
+        timestamp = datetime.now().isoformat()
+
+        print(f"\n{'='*60}")
+        print(f"INGESTING DOCUMENT (STREAMING): {doc_id}")
+        print(f"{'='*60}")
+
+        total_chunks = 0
+        preview = ""
+        last_chunk = None
+
+        # One Neo4j session covers the whole stream
+        with memory_session() as session:
+            for segment in text_segments:
+                if not preview:
+                    preview = segment[:100]
+                chunks = _split_for_ingest(segment)
+                if not chunks:
+                    continue
+                add_chunk_memories(chunks, priority=1.0, source=source, session=session)
+                pairs = list(zip(chunks, chunks[1:]))
+                if last_chunk is not None:
+                    # Link across segment boundaries to keep the NEXT chain intact
+                    pairs.insert(0, (last_chunk, chunks[0]))
+                relate_chunk_pairs(pairs, rel_type="NEXT", session=session)
+                last_chunk = chunks[-1]
+                total_chunks += len(chunks)
+
+        doc_info = {
+            "doc_id": doc_id,
+            "timestamp": timestamp,
+            "source": source,
+            "chunk_count": total_chunks,
+            "text_preview": preview,
+            "metadata": metadata
+        }
+        self.documents.append(doc_info)
+        self._save_documents_meta()
+
+        print(f"[SUCCESS] Document {doc_id} ingested with {total_chunks} chunks (streamed)")
+
+        return doc_info
+
     def list_documents(self):
         """List all ingested documents"""
         print(f"\n{'='*60}")
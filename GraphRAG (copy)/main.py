@@ -3,9 +3,11 @@ GraphRAG Main Module
 Orchestrates document ingestion and query retrieval
 """
 
+import sys
+
 from ingest import ingestion, list_all_documents, show_all_relationships
 from retrieve import retrieval, get_query_history, clear_history
-from memory_manager import load_vector_store
+from memory_manager import load_vector_store, precompute_query_embeddings, flush_vector_store
 from pdf_processor import upload_pdf, upload_directory
 
 # ================================
@@ -41,37 +43,59 @@ RELATIONSHIP_TYPES = {
 }
 
 
+# Shared banner; built once instead of re-evaluated per print call
+_BANNER = '=' * 60
+
+
+def _format_entity_definitions():
+    out = ["\n[ENTITY DEFINITIONS]"]
+    for entity, info in ENTITIES.items():
+        out.append(f"\n  {entity}:")
+        out.append(f"    Type: {info['type']}")
+        out.append(f"    Description: {info['description']}")
+        out.append(f"    Attributes: {', '.join(info['attributes'])}")
+    return '\n'.join(out) + '\n'
+
+
+def _format_relationship_definitions():
+    out = ["\n[RELATIONSHIP TYPE DEFINITIONS]"]
+    for rel_type, description in RELATIONSHIP_TYPES.items():
+        out.append(f"  {rel_type}: {description}")
+    return '\n'.join(out) + '\n'
+
+
+# The definition dicts are module constants, so their formatted output is
+# fixed too — render once at import and make each printer a single write
+_ENTITY_DEF_STR = _format_entity_definitions()
+_REL_DEF_STR = _format_relationship_definitions()
+
+
 def print_entity_definitions():
     """Print all defined entities"""
-    print("\n[ENTITY DEFINITIONS]")
-    for entity, info in ENTITIES.items():
-        print(f"\n  {entity}:")
-        print(f"    Type: {info['type']}")
-        print(f"    Description: {info['description']}")
-        print(f"    Attributes: {', '.join(info['attributes'])}")
+    sys.stdout.write(_ENTITY_DEF_STR)
 
 
 def print_relationship_definitions():
     """Print all defined relationship types"""
-    print("\n[RELATIONSHIP TYPE DEFINITIONS]")
-    for rel_type, description in RELATIONSHIP_TYPES.items():
-        print(f"  {rel_type}: {description}")
+    sys.stdout.write(_REL_DEF_STR)
 
 
 def print_menu():
     """Print the interactive menu"""
-    print(f"\n{'='*60}")
-    print("GRAPHRAG INTERACTIVE MENU")
-    print(f"{'='*60}")
-    print("\n[1] Add a text document")
-    print("[2] Upload PDF/Document file")
-    print("[3] Ask a question")
-    print("[4] View all documents")
-    print("[5] View all relationships")
-    print("[6] View query history")
-    print("[7] Clear query history")
-    print("[8] Exit")
-    print(f"\n{'='*60}")
+    sys.stdout.write('\n'.join([
+        f"\n{_BANNER}",
+        "GRAPHRAG INTERACTIVE MENU",
+        _BANNER,
+        "\n[1] Add a text document",
+        "[2] Upload PDF/Document file",
+        "[3] Ask a question",
+        "[4] View all documents",
+        "[5] View all relationships",
+        "[6] View query history",
+        "[7] Clear query history",
+        "[8] Exit",
+        f"\n{_BANNER}",
+    ]) + '\n')
 
 
 def interactive_mode():
@@ -167,13 +191,17 @@ def interactive_mode():
         
         elif choice == "8":
             # Exit
+            flush_vector_store()
             print("\n[EXIT] Thank you for using GraphRAG!")
             break
-        
+
         else:
             print("[ERROR] Invalid choice. Please try again.")
             print("[ERROR] Invalid choice. Please try again.")
 
+        # Persist any additions made this iteration in one write
+        flush_vector_store()
+
 
 def demo_mode():
     """Run demo with predefined examples - COMPREHENSIVE DATASET"""
@@ -287,11 +315,16 @@ def demo_mode():
         "Who works with you?"
     ]
     
-    for i, question in enumerate(demo_questions, 1):
-        print(f"\n[Question {i}] {question}")
-        retrieval.ask_question(question)
+    # Embed all demo questions in one batched call before the Q&A pass
+    precompute_query_embeddings(demo_questions)
+
+    # Overlap the answer generations instead of blocking on each in turn
+    retrieval.ask_questions(demo_questions)
     
     
+    # All five documents were ingested with deferred saves; write once here
+    flush_vector_store()
+
     # Show query history
     print(f"\n{'='*60}")
     print("DEMO: Query History")
@@ -300,8 +333,6 @@ def demo_mode():
 
 
 if __name__ == "__main__":
-    import sys
-    
     if len(sys.argv) > 1 and sys.argv[1] == "demo":
         # Run demo mode
         demo_mode()
@@ -1,8 +1,18 @@
-from neo4j import GraphDatabase
-from datetime import datetime
+from neo4j import GraphDatabase, RoutingControl
 from langchain_openai import OpenAIEmbeddings
 from langchain_community.vectorstores import FAISS
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores.utils import DistanceStrategy
+import atexit
+import faiss
+import hashlib
+import numpy as np
 import os
+import pickle
+import re
+from collections import OrderedDict
+from contextlib import contextmanager
+from itertools import islice
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -14,165 +24,686 @@ load_dotenv()
 uri = "bolt://localhost:7687"  # Change if using cloud Neo4j
 username = "neo4j"
 password = "Drc@1234"
-driver = GraphDatabase.driver(uri, auth=(username, password))
+driver = GraphDatabase.driver(uri, auth=(username, password), max_connection_pool_size=50)
+
+@contextmanager
+def memory_session():
+    """Yield a Neo4j session for callers batching several writes together"""
+    with driver.session() as session:
+        yield session
 
 # -------------------------------
 # Vector store for RAG (with persistence)
 # -------------------------------
 api_key = os.getenv("OPENAI_API_KEY")
-embeddings = OpenAIEmbeddings(api_key=api_key)
+_embeddings = None  # Created on first use and reused for every call after
+
+# EMBEDDINGS_BACKEND=local swaps OpenAI embeddings (1536-dim, network RTT,
+# per-token cost) for a local all-MiniLM-L6-v2 model (384-dim): 4x smaller
+# index, 4x less search bandwidth, zero API cost. Requires sentence-transformers.
+EMBEDDINGS_BACKEND = os.getenv("EMBEDDINGS_BACKEND", "openai").lower()
+LOCAL_EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+def get_embeddings():
+    """Return the shared embeddings client, creating it on first use.
+
+    Client construction pays config parsing and connection setup, so it is
+    done once per process; scripts that never embed skip it entirely.
+    """
+    global _embeddings
+    if _embeddings is None:
+        if EMBEDDINGS_BACKEND == "local":
+            # ImportError surfaces the missing sentence-transformers extra
+            from langchain_community.embeddings import HuggingFaceEmbeddings
+            _embeddings = HuggingFaceEmbeddings(
+                model_name=LOCAL_EMBEDDING_MODEL,
+                encode_kwargs={"batch_size": 64, "normalize_embeddings": True},
+            )
+            print(f"[EMBEDDINGS] Using local model {LOCAL_EMBEDDING_MODEL}")
+        else:
+            _embeddings = OpenAIEmbeddings(api_key=api_key)
+    return _embeddings
+
 vector_store = None  # Will be initialized when first document is added
 
 VECTOR_STORE_PATH = "faiss_index"
 
+# Index sizing: exact flat search is fine for small stores, but it is O(n)
+# per query. Above this many vectors we switch to HNSW for sub-linear search.
+EMBEDDING_DIM = 384 if EMBEDDINGS_BACKEND == "local" else 1536  # MiniLM vs text-embedding-3-small
+FLAT_INDEX_MAX_VECTORS = 10000
+HNSW_M = 32  # HNSW connectivity (no training needed, ~95%+ recall)
+HNSW_EF_CONSTRUCTION = 200  # build-time beam width; higher = better graph, slower insert
+HNSW_EF_SEARCH = 64  # query-time beam width; candidates visited per search
+# Above this, quantize stored vectors to int8: float32 moves 6KB per 1536-dim
+# vector, SQ8 cuts that 4x and keeps the index cache-resident much longer.
+SQ8_INDEX_MIN_VECTORS = 100000
+# Scalar-quantizer training only fits per-dimension ranges, which converge on
+# a few thousand vectors; training on the full corpus adds nothing but time
+SQ_TRAIN_SAMPLE = 10000
+
+# Opt-in GPU search (requires a faiss-gpu build); persistence stays on CPU
+USE_GPU_INDEX = os.getenv("FAISS_USE_GPU", "0") == "1"
+
+def _maybe_to_gpu(index):
+    """Move a CPU index to GPU 0 when enabled and a GPU build is available"""
+    if not USE_GPU_INDEX:
+        return index
+    try:
+        res = faiss.StandardGpuResources()
+        res.setTempMemory(64 * 1024 * 1024)
+        return faiss.index_cpu_to_gpu(res, 0, index)
+    except AttributeError:
+        print("[GPU] faiss-gpu not installed, keeping index on CPU")
+        return index
+    except Exception as e:
+        print(f"[GPU] Could not move index to GPU: {e}")
+        return index
+
+def _maybe_to_cpu(index):
+    """Bring a GPU index back to CPU (needed before writing to disk)"""
+    if USE_GPU_INDEX and hasattr(faiss, "index_gpu_to_cpu"):
+        try:
+            return faiss.index_gpu_to_cpu(index)
+        except Exception:
+            pass  # already a CPU index
+    return index
+
+def _new_faiss_index(expected_vectors=0, training_vectors=None):
+    """Pick a FAISS index appropriate for the expected corpus size.
+
+    The scalar-quantized tiers need training data, so they are only used
+    on bulk rebuilds where all embeddings are already in hand: fp16 halves
+    vector bytes (and scan bandwidth) from 10k vectors, int8 quarters them
+    from 100k.
+    """
+    if expected_vectors >= FLAT_INDEX_MAX_VECTORS:
+        if training_vectors is not None:
+            if expected_vectors >= SQ8_INDEX_MIN_VECTORS:
+                quantizer_type = faiss.ScalarQuantizer.QT_8bit
+            else:
+                quantizer_type = faiss.ScalarQuantizer.QT_fp16
+            index = faiss.IndexHNSWSQ(EMBEDDING_DIM, quantizer_type, HNSW_M,
+                                      faiss.METRIC_INNER_PRODUCT)
+            index.train(training_vectors[:SQ_TRAIN_SAMPLE])
+        else:
+            index = faiss.IndexHNSWFlat(EMBEDDING_DIM, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        index.hnsw.efSearch = HNSW_EF_SEARCH
+        return index
+    return faiss.IndexFlatIP(EMBEDDING_DIM)
+
+def _new_vector_store(expected_vectors=0, training_vectors=None):
+    """Create an empty FAISS vector store with a size-appropriate index.
+
+    Vectors are L2-normalized and compared by inner product, which is
+    equivalent to cosine similarity but roughly halves the work per vector
+    versus L2 distance.
+    """
+    return FAISS(
+        embedding_function=get_embeddings(),
+        index=_maybe_to_gpu(_new_faiss_index(expected_vectors, training_vectors)),
+        docstore=InMemoryDocstore(),
+        index_to_docstore_id={},
+        normalize_L2=True,
+        distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT,
+    )
+
+# Saving serializes the whole index + docstore, so saving after every add
+# makes N inserts cost O(N^2) bytes of disk IO. Adds set the dirty flag and
+# flush_vector_store() writes once when the caller is done (and at exit).
+_vector_store_dirty = False
+
 def save_vector_store():
     """Save vector store to disk using FAISS built-in method"""
-    global vector_store
+    global vector_store, _vector_store_dirty
     if vector_store is not None:
         try:
+            vector_store.index = _maybe_to_cpu(vector_store.index)
             vector_store.save_local(VECTOR_STORE_PATH)
+            vector_store.index = _maybe_to_gpu(vector_store.index)
+            _vector_store_dirty = False
             print(f"[SAVE] Vector store saved to {VECTOR_STORE_PATH}")
         except Exception as e:
             print(f"[SAVE ERROR] Failed to save vector store: {e}")
 
+def flush_vector_store():
+    """Save the vector store only if it has unsaved additions"""
+    if _vector_store_dirty:
+        save_vector_store()
+
+# Guarantees pending additions reach disk even if the caller forgets to
+# flush or the script exits mid-session
+atexit.register(flush_vector_store)
+
 def load_vector_store():
-    """Load vector store from disk if it exists"""
-    global vector_store
+    """Load vector store from disk if it exists (memory-mapped when possible)"""
+    global vector_store, _stored_chunk_keys
+    _stored_chunk_keys = None  # rebuilt lazily from the freshly loaded docstore
     if os.path.exists(VECTOR_STORE_PATH):
         try:
-            vector_store = FAISS.load_local(VECTOR_STORE_PATH, embeddings, allow_dangerous_deserialization=True)
-            print(f"[LOAD] Vector store loaded from {VECTOR_STORE_PATH}")
-        except Exception as e:
-            print(f"[LOAD ERROR] Failed to load vector store: {e}")
-            vector_store = None
+            # mmap the vector matrix so cold start pays page faults on demand
+            # instead of reading the whole index into RAM up front
+            index_path = os.path.join(VECTOR_STORE_PATH, "index.faiss")
+            meta_path = os.path.join(VECTOR_STORE_PATH, "index.pkl")
+            index = faiss.read_index(index_path, faiss.IO_FLAG_MMAP)
+            with open(meta_path, "rb") as f:
+                docstore, index_to_docstore_id = pickle.load(f)
+            vector_store = FAISS(
+                embedding_function=get_embeddings(),
+                index=_maybe_to_gpu(index),
+                docstore=docstore,
+                index_to_docstore_id=index_to_docstore_id,
+            )
+            print(f"[LOAD] Vector store memory-mapped from {VECTOR_STORE_PATH}")
+        except Exception:
+            # Not all index types support mmap; fall back to the full read
+            try:
+                vector_store = FAISS.load_local(VECTOR_STORE_PATH, get_embeddings(), allow_dangerous_deserialization=True)
+                vector_store.index = _maybe_to_gpu(vector_store.index)
+                print(f"[LOAD] Vector store loaded from {VECTOR_STORE_PATH}")
+            except Exception as e:
+                print(f"[LOAD ERROR] Failed to load vector store: {e}")
+                vector_store = None
     return vector_store
 
 # -------------------------------
 # Split document into chunks (IMPROVED - ENTITY-AWARE with NEGATION MARKERS)
 # -------------------------------
-def split_document(text, chunk_size=100, overlap=10):
+
+# Precompiled once: sentence boundaries and a single alternation covering all
+# negation keywords, instead of one substring scan per keyword per sentence
+_SENTENCE_SPLIT_RE = re.compile(r'[.!?]+')
+NEGATION_KEYWORDS = ('not', 'no longer', "doesn't", "don't", 'left', 'stopped', 'quit', 'resigned')
+_NEGATION_RE = re.compile('|'.join(re.escape(neg) for neg in NEGATION_KEYWORDS))
+
+def _has_negation(text_lower):
+    """True if the (lowercased) text contains any negation keyword"""
+    return _NEGATION_RE.search(text_lower) is not None
+
+def iter_split_document(text, chunk_size=100, overlap=10):
     """
-    Split document into overlapping chunks at sentence boundaries with negation markers
-    
+    Lazily yield overlapping chunks at sentence boundaries with negation markers
+
+    Generator form of split_document: each chunk is yielded as soon as it is
+    complete, so streaming consumers (nlp.pipe, batched embedding) can start
+    work before the whole document is chunked and only one chunk's text is
+    materialized at a time beyond the current window.
+
     Args:
         text (str): Document text to split
         chunk_size (int): Target words per chunk
         overlap (int): Words of overlap between chunks
-    
-    Returns:
-        list: List of text chunks with [NEG] prefix for negation
+
+    Yields:
+        str: Text chunks with [NEG] prefix for negation
     """
-    import re
-    
     # Split by sentences first
-    sentences = re.split(r'[.!?]+', text)
+    sentences = _SENTENCE_SPLIT_RE.split(text)
     sentences = [s.strip() for s in sentences if s.strip()]
-    
+
     if not sentences:
-        return []
-    
-    chunks = []
-    current_chunk = []
-    current_word_count = 0
-    overlap_words = []
-    
-    # Negation keywords to detect
-    negation_keywords = ['not', 'no longer', "doesn't", "don't", 'left', 'stopped', 'quit', 'resigned']
-    
+        return
+
+    yielded_any = False
+    # Single growing word buffer with a head pointer instead of list slicing:
+    # overlap handoff and hard-limit trimming just move `head`, so the loop
+    # copies nothing and chunking stays O(total words) on large documents
+    words_buf = []
+    head = 0
+    overlap_count = 0
+
+    # Loop invariants hoisted out of the per-sentence path
+    hard_limit = chunk_size * 1.5
+    tail_start = chunk_size - overlap
+
     for sentence in sentences:
         words = sentence.split()
         if not words:
             continue
         sentence_word_count = len(words)
-        
+
         # Check if sentence contains negation
         sentence_lower = sentence.lower()
-        has_negation = any(neg in sentence_lower for neg in negation_keywords)
-        
+        has_negation = _has_negation(sentence_lower)
+
         # If adding this sentence exceeds chunk_size, save current chunk and start new
-        if current_word_count + sentence_word_count > chunk_size and current_chunk:
-            chunk_text = ' '.join(current_chunk)
+        if len(words_buf) - head + sentence_word_count > chunk_size and len(words_buf) > head:
+            chunk_text = ' '.join(islice(words_buf, head, len(words_buf)))
             if len(chunk_text.split()) >= 5:
-                chunks.append(chunk_text.strip())
-            
-            # Prepare overlap
-            current_chunk = overlap_words + words
-            current_word_count = len(current_chunk)
+                yielded_any = True
+                yield chunk_text.strip()
+
+            # Start the next chunk at the overlap tail of the previous
+            # sentence (already in the buffer) — no list rebuild needed
+            head = len(words_buf) - overlap_count
+            words_buf.extend(words)
         else:
-            current_chunk.extend(words)
-            current_word_count += sentence_word_count
-        
-        # Save overlap words for next chunk
-        overlap_words = words[-min(overlap, len(words)):] if len(words) > overlap else words
-        
+            words_buf.extend(words)
+
+        # Save overlap size for next chunk (its words are the buffer tail)
+        overlap_count = min(overlap, sentence_word_count) if sentence_word_count > overlap else sentence_word_count
+
         # If chunk is getting too large, finalize it
-        if current_word_count >= chunk_size * 1.5:
-            chunk_text = ' '.join(current_chunk[:chunk_size])
+        if len(words_buf) - head >= hard_limit:
+            chunk_text = ' '.join(islice(words_buf, head, head + chunk_size))
             if len(chunk_text.split()) >= 5:
                 # Add [NEG] marker if contains negation
                 if has_negation:
                     chunk_text = f"[NEG] {chunk_text}"
-                chunks.append(chunk_text.strip())
-            
+                yielded_any = True
+                yield chunk_text.strip()
+
             # Keep overlap for next chunk
-            current_chunk = current_chunk[chunk_size-overlap:]
-            current_word_count = len(current_chunk)
-    
+            head += tail_start
+
+        # Compact the buffer occasionally so it doesn't grow with the document
+        if head > 4 * chunk_size:
+            del words_buf[:head]
+            head = 0
+
     # Add remaining chunk
-    if current_chunk:
-        chunk_text = ' '.join(current_chunk)
+    if len(words_buf) > head:
+        chunk_text = ' '.join(islice(words_buf, head, len(words_buf)))
         if len(chunk_text.split()) >= 5:
             # Check for negation in final chunk
-            if any(neg in chunk_text.lower() for neg in negation_keywords):
+            if _has_negation(chunk_text.lower()):
                 chunk_text = f"[NEG] {chunk_text}"
-            chunks.append(chunk_text.strip())
-    
+            yielded_any = True
+            yield chunk_text.strip()
+
     # If no chunks were created, return the whole text as one chunk
-    if not chunks and text.strip():
+    if not yielded_any and text.strip():
         marked_text = text.strip()
-        if any(neg in marked_text.lower() for neg in negation_keywords):
+        if _has_negation(marked_text.lower()):
             marked_text = f"[NEG] {marked_text}"
-        chunks.append(marked_text)
-    
-    return chunks
+        yield marked_text
+
+
+def split_document(text, chunk_size=100, overlap=10):
+    """
+    Split document into overlapping chunks at sentence boundaries with negation markers
+
+    Args:
+        text (str): Document text to split
+        chunk_size (int): Target words per chunk
+        overlap (int): Words of overlap between chunks
+
+    Returns:
+        list: List of text chunks with [NEG] prefix for negation
+    """
+    return list(iter_split_document(text, chunk_size=chunk_size, overlap=overlap))
+
+# -------------------------------
+# Embedding cache
+# -------------------------------
+# Content-hash -> vector. Re-uploads and overlapping chunks skip the
+# embeddings API entirely; blake2b is fast and plenty for cache keys.
+# The cache is persisted next to the FAISS index so vectors survive
+# process restarts (demo reruns re-embed nothing).
+_embedding_cache = {}
+_embedding_cache_loaded = False
+EMBEDDING_CACHE_PATH = os.path.join(VECTOR_STORE_PATH, "embedding_cache.pkl")
+
+try:
+    # Same tokenizer the OpenAI embeddings endpoint uses; lets batches be
+    # packed against the real token cap instead of guessing from word counts
+    import tiktoken
+    _TOKEN_ENCODER = tiktoken.get_encoding("cl100k_base")
+except ImportError:
+    _TOKEN_ENCODER = None
+
+# Inputs per embeddings request; large enough to amortize the HTTPS
+# round-trip, small enough to stay clear of the per-request token cap
+EMBED_BATCH_SIZE = 256
+# Token budget per request, under the API's ~300K ceiling
+EMBED_BATCH_MAX_TOKENS = 280000
+
+def _pack_embed_batches(texts):
+    """Yield batches capped by item count and, when tiktoken is present, tokens"""
+    if _TOKEN_ENCODER is None:
+        for start in range(0, len(texts), EMBED_BATCH_SIZE):
+            yield texts[start:start + EMBED_BATCH_SIZE]
+        return
+    batch, batch_tokens = [], 0
+    for text in texts:
+        tokens = len(_TOKEN_ENCODER.encode(text))
+        if batch and (len(batch) >= EMBED_BATCH_SIZE
+                      or batch_tokens + tokens > EMBED_BATCH_MAX_TOKENS):
+            yield batch
+            batch, batch_tokens = [], 0
+        batch.append(text)
+        batch_tokens += tokens
+    if batch:
+        yield batch
+
+# Keys are scoped by model so switching backends never serves vectors of
+# the wrong dimensionality from a stale cache
+_CACHE_MODEL_TAG = LOCAL_EMBEDDING_MODEL if EMBEDDINGS_BACKEND == "local" else "openai-default"
+
+def _chunk_cache_key(text):
+    return hashlib.blake2b(f"{_CACHE_MODEL_TAG}\0{text}".encode("utf-8"), digest_size=16).hexdigest()
+
+def _load_embedding_cache():
+    """Load the persisted embedding cache on first use"""
+    global _embedding_cache_loaded
+    if _embedding_cache_loaded:
+        return
+    _embedding_cache_loaded = True
+    try:
+        if os.path.exists(EMBEDDING_CACHE_PATH):
+            with open(EMBEDDING_CACHE_PATH, "rb") as f:
+                _embedding_cache.update(pickle.load(f))
+            print(f"[CACHE] Loaded {len(_embedding_cache)} embedding(s) from disk")
+    except Exception as e:
+        print(f"[CACHE WARNING] Could not load embedding cache: {e}")
+
+def _save_embedding_cache():
+    """Persist the embedding cache after new vectors were added"""
+    try:
+        os.makedirs(VECTOR_STORE_PATH, exist_ok=True)
+        with open(EMBEDDING_CACHE_PATH, "wb") as f:
+            pickle.dump(_embedding_cache, f)
+    except Exception as e:
+        print(f"[CACHE WARNING] Could not save embedding cache: {e}")
+
+def _embed_texts_cached(texts):
+    """Embed texts, reusing cached vectors for content seen before"""
+    _load_embedding_cache()
+    keys = [_chunk_cache_key(text) for text in texts]
+    misses = [i for i, key in enumerate(keys) if key not in _embedding_cache]
+    if misses:
+        # One batched API call covering only unseen content
+        miss_keys, miss_texts, seen = [], [], set()
+        for i in misses:
+            if keys[i] not in seen:
+                seen.add(keys[i])
+                miss_keys.append(keys[i])
+                miss_texts.append(texts[i])
+        vectors = []
+        for batch in _pack_embed_batches(miss_texts):
+            vectors.extend(get_embeddings().embed_documents(batch))
+        for key, vector in zip(miss_keys, vectors):
+            _embedding_cache[key] = vector
+        _save_embedding_cache()
+        if len(misses) < len(texts):
+            print(f"[CACHE] Reused {len(texts) - len(misses)}/{len(texts)} cached embeddings")
+    else:
+        print(f"[CACHE] All {len(texts)} embeddings served from cache")
+    return [_embedding_cache[key] for key in keys]
+
+# -------------------------------
+# Neo4j indexes
+# -------------------------------
+_indexes_ready = False
+
+def ensure_indexes():
+    """Create Neo4j constraints/indexes once so MERGE on Memory nodes doesn't do full label scans"""
+    global _indexes_ready
+    if _indexes_ready:
+        return
+    try:
+        with driver.session() as session:
+            # Plain index (not a uniqueness constraint): every
+            # MERGE (m:Memory {text: ...}) becomes an indexed lookup instead
+            # of a label scan. The FastAPI service writes the same :Memory
+            # label on this database and legitimately stores duplicate texts
+            # (same chunk for different users/projects), so a unique
+            # constraint would break its ingest — and would refuse to be
+            # created at all once such duplicates exist.
+            session.run("CREATE INDEX memory_text IF NOT EXISTS FOR (m:Memory) ON (m.text)")
+            session.run("CREATE INDEX memory_source IF NOT EXISTS FOR (m:Memory) ON (m.source)")
+            # Range indexes serve the ORDER BY priority listings and the
+            # timestamp min/max aggregations without touching every node
+            session.run("""
+                CREATE RANGE INDEX memory_priority IF NOT EXISTS
+                FOR (m:Memory) ON (m.priority)
+            """)
+            session.run("""
+                CREATE RANGE INDEX memory_timestamp IF NOT EXISTS
+                FOR (m:Memory) ON (m.timestamp)
+            """)
+            # Lucene-backed keyword search for the retrieval fallback; a
+            # CONTAINS scan lowercases and substring-matches every node,
+            # the full-text index answers from an inverted index
+            session.run("""
+                CREATE FULLTEXT INDEX memory_fts IF NOT EXISTS
+                FOR (n:Memory) ON EACH [n.text]
+            """)
+        _indexes_ready = True
+        print("[INDEX] Neo4j constraints and indexes ready")
+    except Exception as e:
+        print(f"[INDEX WARNING] Could not create Neo4j indexes: {e}")
 
 # -------------------------------
 # Add chunk memory
 # -------------------------------
 def add_chunk_memory(chunk, priority=1.0, source="document"):
-    global vector_store
-    timestamp = datetime.now()
-    # Add to FAISS
-    if vector_store is None:
-        vector_store = FAISS.from_texts([chunk], embedding=embeddings)
-    else:
-        vector_store.add_texts([chunk])
-    # Save vector store after adding
-    save_vector_store()
-    # Add to Neo4j
-    with driver.session() as session:
-        session.run("""
-            MERGE (m:Memory {text: $text})
-            ON CREATE SET m.timestamp = datetime(), m.priority = $priority, m.source = $source
-            ON MATCH SET m.priority = CASE WHEN $priority > m.priority THEN $priority ELSE m.priority END,
-                         m.timestamp = datetime()
-        """, text=chunk, priority=priority, source=source)
+    """Store a single chunk via the batched path.
+
+    Delegating keeps one implementation: the chunk goes through the
+    embedding cache and UNWIND write like any batch, instead of the old
+    per-chunk add_texts call that always hit the embeddings API.
+    """
+    add_chunk_memories([chunk], priority=priority, source=source)
     print(f"[ADD] Chunk stored: '{chunk[:50]}...' with priority {priority}")
 
+# Content keys of chunks already in the vector store, so re-uploads don't
+# insert duplicate vectors. Built lazily from the docstore, None = stale.
+_stored_chunk_keys = None
+
+def _stored_keys():
+    """Return the set of content keys present in the vector store"""
+    global _stored_chunk_keys
+    if _stored_chunk_keys is None:
+        _stored_chunk_keys = set()
+        if vector_store is not None:
+            try:
+                for doc in vector_store.docstore._dict.values():
+                    _stored_chunk_keys.add(_chunk_cache_key(doc.page_content))
+            except Exception:
+                pass  # unknown docstore shape; treat everything as new
+    return _stored_chunk_keys
+
+# Rows per UNWIND transaction; keeps each write well under Neo4j's memory limits
+NEO4J_WRITE_BATCH = 1000
+
+def _run_row_batches(session, query, rows):
+    """Run an UNWIND query over rows in NEO4J_WRITE_BATCH slices"""
+    for start in range(0, len(rows), NEO4J_WRITE_BATCH):
+        session.run(query, rows=rows[start:start + NEO4J_WRITE_BATCH])
+
+def add_chunk_memories(chunks, priority=1.0, source="document", session=None):
+    """Store many chunks at once, collapsing the Neo4j writes into batched UNWIND queries"""
+    global vector_store, _vector_store_dirty
+    if not chunks:
+        return
+    ensure_indexes()
+    # Drop within-batch duplicates (order preserved) and chunks already in
+    # the vector store; Neo4j writes below stay idempotent via MERGE
+    seen_keys = _stored_keys()
+    new_chunks = [chunk for chunk in dict.fromkeys(chunks)
+                  if _chunk_cache_key(chunk) not in seen_keys]
+    if new_chunks:
+        # Add to FAISS — one embeddings API call for the whole document instead
+        # of one HTTPS round-trip per chunk, skipping content already embedded
+        if vector_store is None:
+            vector_store = _new_vector_store()
+        # Deterministic content-hash ids (instead of auto-generated UUIDs)
+        # make targeted deletes and dedupe checks O(1) key lookups
+        new_keys = [_chunk_cache_key(chunk) for chunk in new_chunks]
+        vector_store.add_embeddings(list(zip(new_chunks, _embed_texts_cached(new_chunks))),
+                                    ids=new_keys)
+        seen_keys.update(new_keys)
+        _vector_store_dirty = True
+    else:
+        print(f"[ADD] All {len(chunks)} chunks already in vector store, skipping embedding")
+    # Add to Neo4j — one round-trip per 1000 chunks instead of one per chunk.
+    # The content key mirrors the FAISS id, so graph rows can be matched to
+    # index vectors without hashing again.
+    rows = [{"text": chunk, "priority": priority, "source": source,
+             "key": _chunk_cache_key(chunk)} for chunk in chunks]
+    query = """
+        UNWIND $rows AS row
+        MERGE (m:Memory {text: row.text})
+        ON CREATE SET m.timestamp = datetime(), m.priority = row.priority, m.source = row.source,
+                      m.content_key = row.key
+        ON MATCH SET m.priority = CASE WHEN row.priority > m.priority THEN row.priority ELSE m.priority END,
+                     m.timestamp = datetime()
+    """
+    if session is not None:
+        _run_row_batches(session, query, rows)
+    else:
+        with driver.session() as own_session:
+            _run_row_batches(own_session, query, rows)
+    _invalidate_query_cache()
+    print(f"[ADD] Stored {len(chunks)} chunks from '{source}'")
+
+# -------------------------------
+# Semantic query cache
+# -------------------------------
+# Demos and chat sessions repeat near-identical queries; a hit here skips
+# both the query-embedding call and the vector/graph searches entirely.
+QUERY_CACHE_MAX = 128
+QUERY_CACHE_SIM_THRESHOLD = 0.97  # cosine; vectors are normalized
+_query_cache = OrderedDict()  # query text -> (k, normalized vec, results)
+
+# Query text -> normalized embedding, so repeated and precomputed queries
+# skip the embed call entirely. LRU-bounded like the results cache above;
+# unbounded it would grow by one 1536-float vector per unique query for
+# the life of the process.
+QUERY_EMBED_CACHE_MAX = 512
+_query_embedding_cache = OrderedDict()
+
+def _query_embedding_cache_store(query, vec):
+    """Record a query embedding, evicting the least recently used entry"""
+    _query_embedding_cache[query] = vec
+    _query_embedding_cache.move_to_end(query)
+    while len(_query_embedding_cache) > QUERY_EMBED_CACHE_MAX:
+        _query_embedding_cache.popitem(last=False)
+
+def _embed_query_normalized(query):
+    """Embed a query and L2-normalize it, or None if embedding fails"""
+    cached = _query_embedding_cache.get(query)
+    if cached is not None:
+        _query_embedding_cache.move_to_end(query)
+        return cached
+    try:
+        vec = np.asarray(get_embeddings().embed_query(query), dtype="float32")
+        norm = np.linalg.norm(vec)
+        if norm:
+            vec = vec / norm
+        _query_embedding_cache_store(query, vec)
+        return vec
+    except Exception as e:
+        print(f"[QUERY CACHE WARNING] Could not embed query: {e}")
+        return None
+
+def precompute_query_embeddings(queries):
+    """Warm the query-embedding cache for a known query list in one batch call.
+
+    Demo and test suites re-run the same hardcoded questions every time;
+    embedding them all up front costs one API round-trip instead of one
+    per question during the run.
+    """
+    missing = [q for q in dict.fromkeys(queries) if q not in _query_embedding_cache]
+    if not missing:
+        return
+    try:
+        vecs = np.asarray(get_embeddings().embed_documents(missing), dtype="float32")
+    except Exception as e:
+        print(f"[WARM WARNING] Could not precompute query embeddings: {e}")
+        return
+    norms = np.linalg.norm(vecs, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    vecs = vecs / norms
+    for query, vec in zip(missing, vecs):
+        _query_embedding_cache_store(query, vec)
+    print(f"[WARM] Precomputed {len(missing)} query embedding(s)")
+
+def _query_cache_lookup(query, k, query_vec):
+    """Return cached results for this query (or a near-duplicate), else None"""
+    entry = _query_cache.get(query)
+    if entry is not None and entry[0] == k:
+        _query_cache.move_to_end(query)
+        return entry[2]
+    if query_vec is None:
+        return None
+    # One BLAS matrix-vector product scores every cached query at once,
+    # instead of a Python-level dot product per entry
+    candidates = [(text, entry) for text, entry in _query_cache.items() if entry[0] == k]
+    if not candidates:
+        return None
+    scores = np.stack([entry[1] for _, entry in candidates]) @ query_vec
+    best = int(np.argmax(scores))
+    if float(scores[best]) >= QUERY_CACHE_SIM_THRESHOLD:
+        cached_query, (_, _, results) = candidates[best]
+        _query_cache.move_to_end(cached_query)
+        print(f"[QUERY CACHE] '{query}' matched cached query '{cached_query}'")
+        return results
+    return None
+
+def _invalidate_query_cache():
+    """Drop all cached query results; must run after every write or delete.
+
+    Cached entries capture pre-mutation state: without this, a question
+    asked before an ingest keeps returning the stale answer, and deleted
+    memories keep being served for up to QUERY_CACHE_MAX queries. The
+    query-embedding cache stays — embeddings don't depend on store contents.
+    """
+    _query_cache.clear()
+
+def _query_cache_store(query, k, query_vec, results):
+    """Record results for a query, evicting the least recently used entry"""
+    if query_vec is None or not results:
+        return
+    _query_cache[query] = (k, query_vec, results)
+    _query_cache.move_to_end(query)
+    while len(_query_cache) > QUERY_CACHE_MAX:
+        _query_cache.popitem(last=False)
+
 # -------------------------------
 # Retrieve relevant memories
 # -------------------------------
+# Common typo corrections applied before the retry search. A single
+# precompiled alternation fixes them all in one C-level pass over the query
+# instead of one scan-and-replace per entry.
+TYPO_FIXES = {
+    'fidn': 'friend',
+    'frnd': 'friend',
+    'fren': 'friend',
+    'wrk': 'work',
+    'wrking': 'working',
+    'drc': 'DRC',
+}
+_TYPO_RE = re.compile(r'\b(?:' + '|'.join(map(re.escape, TYPO_FIXES)) + r')\b', re.I)
+
 def retrieve_relevant_memories(query, k=15):  # INCREASED FROM 5 TO 15
     """Retrieve top k relevant memories using semantic search with entity re-ranking"""
     # If vector store is not available, return empty
     if vector_store is None:
         print(f"[RETRIEVE] No vector store available yet")
         return []
-    
+
+    # Serve repeated (or semantically near-identical) queries from the cache
+    query_vec = _embed_query_normalized(query)
+    cached = _query_cache_lookup(query, k, query_vec)
+    if cached is not None:
+        print(f"[RETRIEVE] Query: '{query}' → {len(cached)} memories (cached)")
+        return cached
+
     def search_with_query(search_query, search_k=k):
-        """Helper to perform semantic search"""
+        """Helper to perform semantic search.
+
+        Searches by vector so the embedding computed for the cache lookup is
+        reused: similarity_search would embed the query a second time inside
+        the FAISS wrapper.
+        """
+        vec = _embed_query_normalized(search_query)
+        if vec is None:
+            return []
         try:
-            results = vector_store.similarity_search(search_query, k=search_k)
+            results = vector_store.similarity_search_by_vector(vec.tolist(), k=search_k)
             return [res.page_content for res in results]
         except Exception as e:
             print(f"[RETRIEVE WARNING] Vector search failed: {e}")
@@ -186,106 +717,153 @@ def retrieve_relevant_memories(query, k=15):  # INCREASED FROM 5 TO 15
     
     # Strategy 2: If query contains common misspellings, try fixing them
     if not semantic_memory_texts or len(semantic_memory_texts) < k:
-        # Common typo fixes
-        typo_fixes = {
-            'fidn': 'friend',
-            'frnd': 'friend',
-            'fren': 'friend',
-            'wrk': 'work',
-            'wrking': 'working',
-            'drc': 'DRC',
-        }
-        
-        expanded_query = query.lower()
-        for typo, correction in typo_fixes.items():
-            if typo in expanded_query:
-                expanded_query = expanded_query.replace(typo, correction)
-        
+        expanded_query = _TYPO_RE.sub(lambda m: TYPO_FIXES[m.group(0).lower()], query.lower())
+
         if expanded_query != query.lower():
             print(f"[RETRIEVE] Retrying with corrected query: '{expanded_query}'")
             semantic_memory_texts = search_with_query(expanded_query, search_k=k)
     
     # Strategy 3: If still not enough results, try keyword search in Neo4j as fallback
     if len(semantic_memory_texts) < k:
-        with driver.session() as session:
-            # Extract key terms from query
-            keywords = [w for w in query.lower().split() if len(w) > 3]
-            
-            if keywords:
-                # Search Neo4j for memories containing these keywords
-                for keyword in keywords[:3]:  # Try top 3 keywords
+        # Extract key terms from query
+        keywords = [w for w in query.lower().split() if len(w) > 3]
+
+        if keywords:
+            limit = k - len(semantic_memory_texts)
+            # One ranked full-text query over all keywords replaces a
+            # CONTAINS label scan per keyword. The index is only created on
+            # the write path, so a read-only process against a fresh
+            # database must create it here (or fall back to CONTAINS).
+            ensure_indexes()
+            records = []
+            try:
+                with driver.session() as session:
                     records = session.run("""
-                        MATCH (m:Memory)
-                        WHERE toLower(m.text) CONTAINS toLower($keyword)
-                        RETURN m.text as text
-                        LIMIT 5
-                    """, keyword=keyword)
-                    
-                    for record in records:
-                        text = record['text']
-                        if text not in semantic_memory_texts:
-                            semantic_memory_texts.append(text)
-                    
-                    if len(semantic_memory_texts) >= k * 0.8:
+                        CALL db.index.fulltext.queryNodes('memory_fts', $q)
+                        YIELD node, score
+                        RETURN node.text as text
+                        ORDER BY score DESC
+                        LIMIT $limit
+                    """, q=" OR ".join(keywords[:5]), limit=limit).data()
+            except Exception as e:
+                print(f"[RETRIEVE WARNING] Full-text fallback failed ({e}), using CONTAINS scan")
+                try:
+                    with driver.session() as session:
+                        records = session.run("""
+                            UNWIND $keywords AS kw
+                            MATCH (m:Memory)
+                            WHERE toLower(m.text) CONTAINS kw
+                            RETURN DISTINCT m.text as text
+                            LIMIT $limit
+                        """, keywords=keywords[:5], limit=limit).data()
+                except Exception as e:
+                    print(f"[RETRIEVE WARNING] Keyword fallback failed: {e}")
+            # Set membership for dedupe: `in list` would rescan the
+            # accumulated results for every fallback row
+            seen = set(semantic_memory_texts)
+            for record in records:
+                text = record['text']
+                if text not in seen:
+                    seen.add(text)
+                    semantic_memory_texts.append(text)
+                    if len(semantic_memory_texts) >= k:
                         break
     
-    # Get metadata from Neo4j for matched texts
-    with driver.session() as session:
-        combined_memories = []
-        seen_texts = set()
-        
-        for text in semantic_memory_texts[:k]:
-            if text in seen_texts:
-                continue
-                
-            record = session.run("""
-                MATCH (m:Memory {text: $text})
+    # Get metadata from Neo4j for matched texts — one UNWIND round-trip for
+    # all k texts instead of one query per text
+    unique_texts = list(dict.fromkeys(semantic_memory_texts[:k]))
+    combined_memories = []
+    if unique_texts:
+        with driver.session() as session:
+            rows = session.run("""
+                UNWIND $texts AS t
+                MATCH (m:Memory {text: t})
                 RETURN m.text as text, m.source as source, m.priority as priority, m.timestamp as timestamp
-                LIMIT 1
-            """, text=text)
-            record_list = [dict(r) for r in record]
-            if record_list:
-                combined_memories.append(record_list[0])
-                seen_texts.add(text)
+            """, texts=unique_texts).data()
+        # Re-impose the similarity ordering, which UNWIND does not guarantee
+        by_text = {row['text']: row for row in rows}
+        combined_memories = [by_text[text] for text in unique_texts if text in by_text]
     
+    _query_cache_store(query, k, query_vec, combined_memories)
     print(f"[RETRIEVE] Query: '{query}' → Found {len(combined_memories)} relevant memories")
     return combined_memories
 
+def get_memories_table():
+    """Retrieve all memories as parallel columns (structure-of-arrays).
+
+    Bulk passes (filtering by priority, batch re-embedding, stats) work on
+    contiguous arrays instead of a list of per-row dicts: priorities come
+    back as one float32 vector ready for numpy masks like
+    `table['priorities'] >= 1.5`.
+    """
+    texts, sources, priorities, timestamps = [], [], [], []
+    records, _, _ = driver.execute_query("""
+        MATCH (m:Memory)
+        RETURN m.text as text, m.source as source, m.priority as priority, m.timestamp as timestamp
+        ORDER BY m.timestamp DESC
+    """, routing_=RoutingControl.READ)
+    for record in records:
+        texts.append(record['text'])
+        sources.append(record['source'])
+        priorities.append(record['priority'] if record['priority'] is not None else 0.0)
+        timestamps.append(record['timestamp'])
+    return {
+        "texts": texts,
+        "sources": sources,
+        "priorities": np.asarray(priorities, dtype="float32"),
+        "timestamps": timestamps,
+    }
+
 def get_all_memories():
-    """Retrieve all memories from Neo4j with full details"""
-    with driver.session() as session:
-        records = session.run("""
-            MATCH (m:Memory) 
-            RETURN m.text as text, m.source as source, m.priority as priority, m.timestamp as timestamp
-            ORDER BY m.timestamp DESC
-        """)
-        memories = [dict(record) for record in records]
-    return memories
+    """Retrieve all memories from Neo4j with full details (one dict per row)"""
+    table = get_memories_table()
+    return [
+        {"text": text, "source": source, "priority": float(priority), "timestamp": timestamp}
+        for text, source, priority, timestamp
+        in zip(table["texts"], table["sources"], table["priorities"], table["timestamps"])
+    ]
 
 # -------------------------------
 # Add relationships between chunks
 # -------------------------------
 def relate_chunks(chunk1, chunk2, rel_type="RELATED"):
-    with driver.session() as session:
-        session.run(f"""
-            MATCH (a:Memory {{text: $chunk1}})
-            MATCH (b:Memory {{text: $chunk2}})
-            MERGE (a)-[:{rel_type}]->(b)
-        """, chunk1=chunk1, chunk2=chunk2)
+    # execute_query reuses a pooled session internally, skipping the
+    # per-call session setup a `with driver.session()` block pays
+    driver.execute_query(f"""
+        MATCH (a:Memory {{text: $chunk1}})
+        MATCH (b:Memory {{text: $chunk2}})
+        MERGE (a)-[:{rel_type}]->(b)
+    """, chunk1=chunk1, chunk2=chunk2)
     print(f"[RELATE] '{chunk1[:30]}...' → '{chunk2[:30]}...'")
 
+def relate_chunk_pairs(pairs, rel_type="RELATED", session=None):
+    """Create relationships for many (from, to) chunk pairs in batched UNWIND queries"""
+    if not pairs:
+        return
+    rows = [{"from": chunk1, "to": chunk2} for chunk1, chunk2 in pairs]
+    query = f"""
+        UNWIND $rows AS row
+        MATCH (a:Memory {{text: row.from}})
+        MATCH (b:Memory {{text: row.to}})
+        MERGE (a)-[:{rel_type}]->(b)
+    """
+    if session is not None:
+        _run_row_batches(session, query, rows)
+    else:
+        with driver.session() as own_session:
+            _run_row_batches(own_session, query, rows)
+    print(f"[RELATE] Created {len(pairs)} {rel_type} relationship(s)")
+
 # -------------------------------
 # Retrieve and print relationships
 # -------------------------------
 def get_relationships():
     """Retrieve all relationships between memory chunks"""
-    with driver.session() as session:
-        result = session.run("""
-            MATCH (a:Memory)-[r]->(b:Memory)
-            RETURN a.text as from_text, type(r) as relationship_type, b.text as to_text
-        """)
-        relationships = [record for record in result]
-    return relationships
+    records, _, _ = driver.execute_query("""
+        MATCH (a:Memory)-[r]->(b:Memory)
+        RETURN a.text as from_text, type(r) as relationship_type, b.text as to_text
+    """, routing_=RoutingControl.READ)
+    return records
 
 def print_relationships():
     """Print all relationships in a readable format"""
@@ -307,8 +885,10 @@ def print_relationships():
 # -------------------------------
 def clear_all_memories():
     """Delete all memories from database and rebuild vector store"""
-    global vector_store
-    
+    global vector_store, _stored_chunk_keys
+    _stored_chunk_keys = None
+    _invalidate_query_cache()
+
     # Clear Neo4j
     with driver.session() as session:
         session.run("MATCH (m:Memory) DELETE m")
@@ -323,63 +903,109 @@ def clear_all_memories():
 
 def remove_bad_memories(patterns):
     """Remove memories containing specific patterns"""
-    global vector_store
-    
-    with driver.session() as session:
-        for pattern in patterns:
-            session.run("""
-                MATCH (m:Memory)
-                WHERE toLower(m.text) CONTAINS toLower($pattern)
-                DELETE m
-            """, pattern=pattern)
-            print(f"[REMOVE] Deleted memories containing '{pattern}'")
-    
-    # Rebuild vector store from scratch
-    print("[REBUILD] Rebuilding vector store...")
-    vector_store = None
-    import shutil
-    if os.path.exists(VECTOR_STORE_PATH):
-        shutil.rmtree(VECTOR_STORE_PATH)
-    
-    # Reload all remaining memories into vector store
+    global vector_store, _stored_chunk_keys
+    _stored_chunk_keys = None
+    _invalidate_query_cache()
+
+    # One round-trip deletes across all patterns and returns the removed
+    # texts, so the FAISS cleanup below needs no separate select pass
     with driver.session() as session:
         records = session.run("""
+            UNWIND $patterns AS pattern
             MATCH (m:Memory)
-            RETURN m.text as text
-        """)
-        texts = [record['text'] for record in records]
-    
-    if texts:
-        vector_store = FAISS.from_texts(texts, embedding=embeddings)
+            WHERE toLower(m.text) CONTAINS toLower(pattern)
+            WITH DISTINCT m
+            WITH m, m.text AS text
+            DELETE m
+            RETURN text
+        """, patterns=list(patterns))
+        to_remove = {record['text'] for record in records}
+    print(f"[REMOVE] Deleted {len(to_remove)} memories matching {len(patterns)} pattern(s)")
+
+    if vector_store is None or not to_remove:
+        return
+
+    try:
+        # Content-hash ids resolve directly; older UUID-keyed entries (stores
+        # written before deterministic ids) fall back to a docstore scan
+        docstore_ids = vector_store.docstore._dict
+        ids = [key for key in (_chunk_cache_key(text) for text in to_remove)
+               if key in docstore_ids]
+        if len(ids) < len(to_remove):
+            known = set(ids)
+            ids.extend(id_ for id_, doc in docstore_ids.items()
+                       if id_ not in known and doc.page_content in to_remove)
+        if ids:
+            vector_store.delete(ids)
         save_vector_store()
-        print(f"[REBUILD] Vector store rebuilt with {len(texts)} memories")
-    else:
-        print("[REBUILD] No memories left after cleanup")
+        print(f"[REMOVE] Dropped {len(ids)} vector(s) from the index in place")
+    except Exception as e:
+        # Some index types (e.g. HNSW) cannot remove vectors; fall back to
+        # the cached batch rebuild from the graph
+        print(f"[REMOVE WARNING] In-place delete failed ({e}), rebuilding index")
+        reembed_all()
+
+def reembed_all():
+    """Re-embed every memory with the current backend and rebuild the index.
+
+    One-time migration for switching EMBEDDINGS_BACKEND (e.g. OpenAI 1536-dim
+    to local MiniLM 384-dim): Neo4j text is the source of truth, so the FAISS
+    index can always be regenerated with one batched encode pass.
+    """
+    global vector_store, _stored_chunk_keys
+    _stored_chunk_keys = None
+    _invalidate_query_cache()
+
+    with driver.session() as session:
+        records = session.run("MATCH (m:Memory) RETURN m.text as text")
+        texts = [record['text'] for record in records]
+
+    if not texts:
+        print("[REEMBED] No memories to re-embed")
+        return
+
+    print(f"[REEMBED] Re-embedding {len(texts)} memories with the '{EMBEDDINGS_BACKEND}' backend...")
+    vecs = np.asarray(_embed_texts_cached(texts), dtype="float32")
+    faiss.normalize_L2(vecs)
+    vector_store = _new_vector_store(expected_vectors=len(texts), training_vectors=vecs)
+    vector_store.add_embeddings(list(zip(texts, vecs)))
+    save_vector_store()
+    print(f"[REEMBED] Vector store rebuilt with {len(texts)} memories")
 
 # -------------------------------
 # Decay memory
 # -------------------------------
 def decay_memory(days=30):
     """Reduce priority of old memories but keep them"""
-    with driver.session() as session:
-        session.run("""
-            MATCH (m:Memory)
-            WHERE duration.between(m.timestamp, datetime()).days > $days
-            SET m.priority = m.priority * 0.5
-        """, days=days)
+    driver.execute_query("""
+        MATCH (m:Memory)
+        WHERE duration.between(m.timestamp, datetime()).days > $days
+        SET m.priority = m.priority * 0.5
+    """, days=days)
+    # Cached results carry priority metadata, so they are stale now too
+    _invalidate_query_cache()
     print(f"[DECAY] Memories older than {days} days had priority reduced")
 
 # ================================
 # RELATIONSHIP GRAPH VISUALIZATION
 # ================================
 
-def print_relationship_graph():
+@contextmanager
+def _graph_session(session):
+    """Yield the caller's session, or open and close a fresh one when None"""
+    if session is not None:
+        yield session
+    else:
+        with driver.session() as session:
+            yield session
+
+def print_relationship_graph(session=None):
     """Print text-based relationship graph of memories and entities"""
     print("\n" + "="*80)
     print("📊 RELATIONSHIP GRAPH - TEXT VISUALIZATION")
     print("="*80)
-    
-    with driver.session() as session:
+
+    with _graph_session(session) as session:
         # Get all memories
         records = session.run("""
             MATCH (m:Memory)
@@ -410,29 +1036,23 @@ def print_relationship_graph():
             print(f"    Text: {text}...")
             print(f"    Source: {source} | Time: {timestamp}")
 
-def print_entity_relationships():
+def print_entity_relationships(session=None):
     """Print entity-to-entity relationships"""
     print("\n" + "="*80)
     print("👥 ENTITY RELATIONSHIPS")
     print("="*80)
-    
-    entities = {
-        'Parth': [],
-        'Raju': [],
-        'Adil': [],
-        'DRC Systems': []
-    }
-    
-    # Extract entity relationships from memories
-    with driver.session() as session:
+
+    # Count entity mentions server-side; the old version shipped every memory
+    # text over bolt and then never even read the result
+    with _graph_session(session) as session:
         records = session.run("""
-            MATCH (m:Memory)
-            RETURN m.text as text
-            ORDER BY m.priority DESC
+            UNWIND ['Parth', 'Raju', 'Adil', 'DRC Systems'] as entity
+            MATCH (m:Memory) WHERE m.text CONTAINS entity
+            RETURN entity, COUNT(m) as mentions
         """)
-        
-        all_memories = [r['text'] for r in records]
-    
+        mention_counts = {r['entity']: r['mentions'] for r in records}
+
+
     # Define relationship keywords
     relationships = {
         'Parth': {
@@ -461,35 +1081,40 @@ def print_entity_relationships():
     print("-" * 80)
     
     for entity, info in relationships.items():
-        print(f"\n📍 {entity}")
+        print(f"\n📍 {entity} ({mention_counts.get(entity, 0)} mentions)")
         for key, value in info.items():
             if isinstance(value, list):
                 print(f"   ├─ {key.replace('_', ' ').title()}: {', '.join(value)}")
             else:
                 print(f"   └─ {key.replace('_', ' ').title()}: {value}")
 
-def print_memory_tree():
+def print_memory_tree(session=None):
     """Print memory hierarchy as a tree"""
     print("\n" + "="*80)
     print("🌳 MEMORY TREE STRUCTURE")
     print("="*80)
-    
-    with driver.session() as session:
+
+    # The grand total rides along on every row via a collect/sum/UNWIND pass,
+    # so Python no longer re-sums what the server already aggregated
+    with _graph_session(session) as session:
         records = session.run("""
             MATCH (m:Memory)
-            RETURN m.source as source, COUNT(*) as count, AVG(m.priority) as avg_priority
+            WITH m.source as src, COUNT(*) as c, AVG(m.priority) as ap
+            WITH COLLECT({src: src, c: c, ap: ap}) as rows, SUM(c) as total
+            UNWIND rows as r
+            RETURN r.src as source, r.c as count, r.ap as avg_priority, total
             ORDER BY count DESC
         """)
-        
+
         sources = list(records)
-    
+
     if not sources:
         print("[INFO] No memory sources yet")
         return
-    
+
     print(f"\n📦 Memory Organization by Source:\n")
-    
-    total_memories = sum(s['count'] for s in sources)
+
+    total_memories = sources[0]['total']
     
     for i, source in enumerate(sources):
         src_name = source['source']
@@ -510,46 +1135,32 @@ def print_memory_tree():
         print(f"{next_prefix}├─ Avg Priority: {avg_prio:.1f}")
         print(f"{next_prefix}└─ Percentage: {percentage:.1f}%\n")
 
-def print_graph_stats():
+def print_graph_stats(session=None):
     """Print graph database statistics"""
     print("\n" + "="*80)
     print("📈 GRAPH DATABASE STATISTICS")
     print("="*80)
-    
-    with driver.session() as session:
-        # Total memories
-        total = session.run("MATCH (m:Memory) RETURN COUNT(m) as count").single()['count']
-        
-        # Average priority
-        avg_prio = session.run("MATCH (m:Memory) RETURN AVG(m.priority) as avg").single()['avg']
-        
-        # Max priority
-        max_prio = session.run("MATCH (m:Memory) RETURN MAX(m.priority) as max").single()['max']
-        
-        # Min priority
-        min_prio = session.run("MATCH (m:Memory) RETURN MIN(m.priority) as min").single()['min']
-        
-        # Sources
-        sources = session.run("MATCH (m:Memory) RETURN DISTINCT m.source as source")
-        source_list = [r['source'] for r in sources]
-        
-        # Newest memory
-        newest = session.run("""
-            MATCH (m:Memory)
-            RETURN m.timestamp as timestamp
-            ORDER BY m.timestamp DESC
-            LIMIT 1
-        """).single()
-        newest_time = newest['timestamp'] if newest else None
-        
-        # Oldest memory
-        oldest = session.run("""
+
+    # One aggregation pass computes every stat server-side: the old version
+    # issued seven queries, each paying its own bolt round-trip and label scan
+    with _graph_session(session) as session:
+        stats = session.run("""
             MATCH (m:Memory)
-            RETURN m.timestamp as timestamp
-            ORDER BY m.timestamp ASC
-            LIMIT 1
+            RETURN COUNT(m) as total,
+                   AVG(m.priority) as avg_prio,
+                   MAX(m.priority) as max_prio,
+                   MIN(m.priority) as min_prio,
+                   COLLECT(DISTINCT m.source) as sources,
+                   MAX(m.timestamp) as newest,
+                   MIN(m.timestamp) as oldest
         """).single()
-        oldest_time = oldest['timestamp'] if oldest else None
+    total = stats['total']
+    avg_prio = stats['avg_prio']
+    max_prio = stats['max_prio']
+    min_prio = stats['min_prio']
+    source_list = stats['sources']
+    newest_time = stats['newest']
+    oldest_time = stats['oldest']
     
     print(f"\n📊 Database Summary:")
     print(f"   ├─ Total Memories: {total}")
@@ -567,10 +1178,13 @@ def print_complete_graph():
     print("🔗 COMPLETE RELATIONSHIP GRAPH")
     print("="*80)
     
-    print_graph_stats()
-    print_memory_tree()
-    print_entity_relationships()
-    print_relationship_graph()
+    # One session serves all four reports; each used to open (and tear down)
+    # its own bolt session for what is a single sequential dump
+    with driver.session(database="neo4j") as session:
+        print_graph_stats(session=session)
+        print_memory_tree(session=session)
+        print_entity_relationships(session=session)
+        print_relationship_graph(session=session)
     
     print("\n" + "="*80)
     print("✅ Graph visualization complete")
@@ -5,6 +5,7 @@ Handles retrieving memories and generating answers using LLM
 
 from memory_manager import retrieve_relevant_memories, get_all_memories
 from langchain_openai import ChatOpenAI
+import asyncio
 import os
 from dotenv import load_dotenv
 
@@ -22,17 +23,8 @@ class QueryRetrieval:
         self.queries = []
         self.answers = []
     
-    def generate_answer(self, query, memories):
-        """
-        Generate an answer based on retrieved memories using LLM
-        
-        Args:
-            query (str): The question to answer
-            memories (list): List of retrieved memory dictionaries
-        
-        Returns:
-            str: The generated answer
-        """
+    def _build_answer_prompt(self, query, memories):
+        """Build the answer-generation prompt for a query and its memories"""
         # Extract text and metadata from memories (handle both dict and object formats)
         def extract_text(m):
             if isinstance(m, dict):
@@ -94,9 +86,20 @@ RELEVANT MEMORIES (READ ALL OF THEM COMPLETELY):
 User Question: {query}
 
 ANSWER:"""
-        
-        # Generate answer
-        response = llm.invoke(prompt)
+        return prompt
+
+    def generate_answer(self, query, memories):
+        """
+        Generate an answer based on retrieved memories using LLM
+
+        Args:
+            query (str): The question to answer
+            memories (list): List of retrieved memory dictionaries
+
+        Returns:
+            str: The generated answer
+        """
+        response = llm.invoke(self._build_answer_prompt(query, memories))
         return response.content
     
     def ask_question(self, query, k=15):  # INCREASED FROM 5 TO 15
@@ -167,7 +170,66 @@ ANSWER:"""
         self.answers.append(answer)
         
         return query_result
-    
+
+    # Concurrent in-flight answer generations; bounded to respect rate limits
+    MAX_ANSWER_CONCURRENCY = 5
+
+    def ask_questions(self, queries, k=15):
+        """
+        Answer many questions with overlapped LLM calls
+
+        Retrieval is local (FAISS + bolt on localhost), but each answer is a
+        network round-trip to the chat model. The retrievals run up front,
+        then all answer generations are issued concurrently, so a question
+        list takes roughly max(latency) per concurrency slot instead of
+        sum(latencies).
+
+        Args:
+            queries (list): Questions to answer, in order
+            k (int): Number of top memories to retrieve per question
+
+        Returns:
+            list: One result dict per question, in input order
+        """
+        memories_per_query = [retrieve_relevant_memories(q, k=k) for q in queries]
+
+        async def generate_all():
+            semaphore = asyncio.Semaphore(self.MAX_ANSWER_CONCURRENCY)
+
+            async def generate_one(query, memories):
+                if not memories:
+                    return "No relevant information found."
+                async with semaphore:
+                    response = await llm.ainvoke(self._build_answer_prompt(query, memories))
+                    return response.content
+
+            return await asyncio.gather(
+                *(generate_one(q, mems) for q, mems in zip(queries, memories_per_query)),
+                return_exceptions=True,
+            )
+
+        answers = asyncio.run(generate_all())
+
+        results = []
+        for query, memories, answer in zip(queries, memories_per_query, answers):
+            if isinstance(answer, Exception):
+                answer = f"[ERROR] Answer generation failed: {answer}"
+            print(f"\n{'='*60}")
+            print(f"QUERY: {query}")
+            print(f"{'='*60}")
+            print(f"[RETRIEVED {len(memories)} SEMANTIC MATCHES]")
+            print(f"\n[ANSWER]\n{answer}")
+            query_result = {
+                "query": query,
+                "memories_count": len(memories),
+                "memories": memories,
+                "answer": answer
+            }
+            self.queries.append(query_result)
+            self.answers.append(answer)
+            results.append(query_result)
+        return results
+
     def get_query_history(self):
         """Get all previous queries and answers"""
         print(f"\n{'='*60}")
@@ -34,9 +34,9 @@ try:
     
     # Simple test
     print(f"  → Sending test message...")
-    start = time.time()
+    start = time.perf_counter()
     response = llm.invoke("Say 'API is working' in one sentence")
-    elapsed = time.time() - start
+    elapsed = time.perf_counter() - start
     
     print(f"✓ Response received in {elapsed:.2f}s")
     print(f"  Answer: {response.content}")
@@ -58,9 +58,9 @@ try:
     
     # Simple test
     print(f"  → Creating embedding for test text...")
-    start = time.time()
+    start = time.perf_counter()
     embedding = embeddings.embed_query("Parth Kumar works at DRC Systems")
-    elapsed = time.time() - start
+    elapsed = time.perf_counter() - start
     
     print(f"✓ Embedding created in {elapsed:.2f}s")
     print(f"  Dimension: {len(embedding)} (expected 1536)")
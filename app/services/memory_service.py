@@ -1,21 +1,128 @@
 
+import atexit
+import hashlib
+import heapq
 import os
+import re
 import shutil
 import logging
 from typing import List, Dict, Optional, Any
 from datetime import datetime
 from pathlib import Path
 
+import pickle
+
+import numpy as np
 from neo4j import GraphDatabase
 from langchain_openai import OpenAIEmbeddings
 from langchain_community.vectorstores import FAISS
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores.utils import DistanceStrategy
 from langchain_core.documents import Document
+import faiss
 
 from app.config import settings
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Embedding dimensionality of text-embedding-ada-002 / text-embedding-3-small
+EMBEDDING_DIM = 1536
+# Exact (flat) search is O(n) per query; above this many vectors we build an
+# HNSW graph index instead, which searches in roughly O(log n)
+HNSW_MIN_VECTORS = 10000
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+
+# Precompiled once at import: the sentence splitter and a single alternation
+# over the negation keywords. One C-level regex search per sentence replaces
+# eight Python-level substring scans
+_SENT_RE = re.compile(r'[.!?]+')
+_NEG_RE = re.compile(
+    r"\b(?:not|no longer|doesn't|don't|left|stopped|quit|resigned)\b", re.I)
+
+class CachedEmbeddings:
+    """Embeddings wrapper that memoizes vectors by content hash.
+
+    Document chunks repeat heavily (overlap windows, re-uploads, chat
+    echoes), and each repeat used to be a paid API call. Vectors are keyed
+    by blake2b of the text and persisted next to the FAISS index, so only
+    unseen content reaches the upstream client.
+    """
+
+    # Flush to disk after this many new vectors accumulate (plus at exit),
+    # instead of re-pickling the whole cache on every novel query
+    SAVE_EVERY = 32
+
+    def __init__(self, inner, cache_path: str = "faiss_index/embedding_cache.pkl"):
+        self.inner = inner
+        self.cache_path = cache_path
+        self._cache = {}
+        self._loaded = False
+        self._unsaved = 0
+        atexit.register(self._save)
+
+    @staticmethod
+    def _key(text: str) -> str:
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            if os.path.exists(self.cache_path):
+                with open(self.cache_path, "rb") as f:
+                    self._cache.update(pickle.load(f))
+                logger.info(f"Loaded {len(self._cache)} cached embedding(s)")
+        except Exception as e:
+            logger.warning(f"Could not load embedding cache: {e}")
+
+    def _save(self):
+        if not self._unsaved:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with open(self.cache_path, "wb") as f:
+                pickle.dump(self._cache, f)
+            self._unsaved = 0
+        except Exception as e:
+            logger.warning(f"Could not save embedding cache: {e}")
+
+    def _record(self, key: str, vector: List[float]):
+        self._cache[key] = vector
+        self._unsaved += 1
+        if self._unsaved >= self.SAVE_EVERY:
+            self._save()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self._load()
+        keys = [self._key(text) for text in texts]
+        # Call upstream only for unseen content, deduplicated within the batch.
+        # The companion set keeps the dedupe check O(1); `key in miss_keys`
+        # would rescan the list per chunk
+        miss_keys, miss_texts, miss_seen = [], [], set()
+        for key, text in zip(keys, texts):
+            if key not in self._cache and key not in miss_seen:
+                miss_seen.add(key)
+                miss_keys.append(key)
+                miss_texts.append(text)
+        if miss_texts:
+            for key, vector in zip(miss_keys, self.inner.embed_documents(miss_texts)):
+                self._record(key, vector)
+        return [self._cache[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        self._load()
+        key = self._key(text)
+        vector = self._cache.get(key)
+        if vector is None:
+            vector = self.inner.embed_query(text)
+            self._record(key, vector)
+        return vector
+
+
 class MemoryService:
     """Service for managing long-term memory (Neo4j + FAISS)"""
     
@@ -28,7 +135,7 @@ class MemoryService:
         
         # FAISS setup
         self.vector_store_path = "faiss_index"
-        self.embeddings = OpenAIEmbeddings(api_key=settings.OPENAI_API_KEY)
+        self.embeddings = CachedEmbeddings(OpenAIEmbeddings(api_key=settings.OPENAI_API_KEY))
         self.vector_store = self._load_vector_store()
         
     def close(self):
@@ -36,13 +143,33 @@ class MemoryService:
         self.driver.close()
 
     def _load_vector_store(self):
-        """Load FAISS index from disk"""
-        if os.path.exists(self.vector_store_path):
+        """Load FAISS index from disk (memory-mapped when possible)"""
+        if not os.path.exists(self.vector_store_path):
+            return None
+        try:
+            # mmap the index so startup pays page faults on demand instead
+            # of reading the whole vector matrix into RAM up front
+            index = faiss.read_index(
+                os.path.join(self.vector_store_path, "index.faiss"),
+                faiss.IO_FLAG_MMAP
+            )
+            with open(os.path.join(self.vector_store_path, "index.pkl"), "rb") as f:
+                docstore, index_to_docstore_id = pickle.load(f)
+            vs = FAISS(
+                embedding_function=self.embeddings,
+                index=index,
+                docstore=docstore,
+                index_to_docstore_id=index_to_docstore_id,
+            )
+            logger.info(f"Memory-mapped vector store from {self.vector_store_path}")
+            return vs
+        except Exception:
+            # Not all index types support mmap; fall back to the full read
             try:
                 # allow_dangerous_deserialization is needed for loading local pickle files
                 vs = FAISS.load_local(
-                    self.vector_store_path, 
-                    self.embeddings, 
+                    self.vector_store_path,
+                    self.embeddings,
                     allow_dangerous_deserialization=True
                 )
                 logger.info(f"Loaded vector store from {self.vector_store_path}")
@@ -50,7 +177,29 @@ class MemoryService:
             except Exception as e:
                 logger.error(f"Failed to load vector store: {e}")
                 return None
-        return None
+
+    def _new_vector_store(self, expected_vectors: int = 0):
+        """Create an empty vector store with an index sized for the corpus.
+
+        Vectors are L2-normalized and compared by inner product (cosine):
+        the dot-product kernel does roughly half the arithmetic of an L2
+        distance per candidate and vectorizes better, with identical
+        ranking on normalized vectors.
+        """
+        if expected_vectors >= HNSW_MIN_VECTORS:
+            index = faiss.IndexHNSWFlat(EMBEDDING_DIM, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+            index.hnsw.efSearch = HNSW_EF_SEARCH
+        else:
+            index = faiss.IndexFlatIP(EMBEDDING_DIM)
+        return FAISS(
+            embedding_function=self.embeddings,
+            index=index,
+            docstore=InMemoryDocstore(),
+            index_to_docstore_id={},
+            normalize_L2=True,
+            distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT,
+        )
 
     def _save_vector_store(self):
         """Save FAISS index to disk"""
@@ -67,35 +216,29 @@ class MemoryService:
         """
         Splits text into overlapping chunks at sentence boundaries with negation markers
         """
-        import re
-        
         # Split by sentences first
-        sentences = re.split(r'[.!?]+', text)
+        sentences = _SENT_RE.split(text)
         sentences = [s.strip() for s in sentences if s.strip()]
-        
+
         if not sentences:
             return []
-        
+
         chunks = []
         current_chunk = []
         current_word_count = 0
         overlap_words = []
-        
-        # Negation keywords to detect
-        negation_keywords = ['not', 'no longer', "doesn't", "don't", 'left', 'stopped', 'quit', 'resigned']
-        
+
         chunk_word_limit = 100 # Approx equivalent to 500 chars
         overlap = 10
-        
+
         for sentence in sentences:
             words = sentence.split()
             if not words:
                 continue
             sentence_word_count = len(words)
-            
+
             # Check if sentence contains negation
-            sentence_lower = sentence.lower()
-            has_negation = any(neg in sentence_lower for neg in negation_keywords)
+            has_negation = _NEG_RE.search(sentence) is not None
             
             # If adding this sentence exceeds chunk_size, save current chunk and start new
             if current_word_count + sentence_word_count > chunk_word_limit and current_chunk:
@@ -131,14 +274,14 @@ class MemoryService:
             chunk_text = ' '.join(current_chunk)
             if len(chunk_text.split()) >= 5:
                 # Check for negation in final chunk
-                if any(neg in chunk_text.lower() for neg in negation_keywords):
+                if _NEG_RE.search(chunk_text) is not None:
                     chunk_text = f"[NEG] {chunk_text}"
                 chunks.append(chunk_text.strip())
-        
+
         # If no chunks were created, return the whole text as one chunk
         if not chunks and text.strip():
             marked_text = text.strip()
-            if any(neg in marked_text.lower() for neg in negation_keywords):
+            if _NEG_RE.search(marked_text) is not None:
                 marked_text = f"[NEG] {marked_text}"
             chunks.append(marked_text)
             
@@ -173,37 +316,39 @@ class MemoryService:
                 meta["conversation_id"] = conversation_id  # NEW: Tag with conversation
         
         if self.vector_store is None:
-            self.vector_store = FAISS.from_texts(vectors, self.embeddings, metadatas=metadatas)
-        else:
-            self.vector_store.add_texts(vectors, metadatas=metadatas)
+            self.vector_store = self._new_vector_store(len(vectors))
+        self.vector_store.add_texts(vectors, metadatas=metadatas)
             
         self._save_vector_store()
         
-        # Add to Neo4j
+        # Add to Neo4j - one UNWIND round-trip for all chunks instead of
+        # two queries per chunk
+        rows = [{"text": chunk, "index": i} for i, chunk in enumerate(chunks)]
         with self.driver.session() as session:
-            for i, chunk in enumerate(chunks):
+            session.run("""
+                MERGE (d:Document {id: $doc_id})
+                ON CREATE SET d.source = $source, d.timestamp = datetime(), d.user_id = $user_id, d.project_id = $project_id, d.conversation_id = $conversation_id
+                WITH d
+                UNWIND $rows AS row
+                CREATE (m:Memory {text: row.text})
+                SET m.chunk_index = row.index,
+                    m.timestamp = datetime(),
+                    m.priority = 1.0,
+                    m.user_id = $user_id,
+                    m.project_id = $project_id,
+                    m.conversation_id = $conversation_id
+                MERGE (d)-[:CONTAINS]->(m)
+            """, rows=rows, doc_id=doc_id, source=source, user_id=user_id, project_id=project_id, conversation_id=conversation_id)
+
+            # Link consecutive chunks in one batched pass
+            if len(chunks) > 1:
+                pairs = [{"prev": prev, "curr": curr} for prev, curr in zip(chunks, chunks[1:])]
                 session.run("""
-                    MERGE (d:Document {id: $doc_id})
-                    ON CREATE SET d.source = $source, d.timestamp = datetime(), d.user_id = $user_id, d.project_id = $project_id, d.conversation_id = $conversation_id
-                    
-                    CREATE (m:Memory {text: $text})
-                    SET m.chunk_index = $index, 
-                        m.timestamp = datetime(),
-                        m.priority = 1.0,
-                        m.user_id = $user_id,
-                        m.project_id = $project_id,
-                        m.conversation_id = $conversation_id
-                    
-                    MERGE (d)-[:CONTAINS]->(m)
-                """, doc_id=doc_id, source=source, user_id=user_id, project_id=project_id, conversation_id=conversation_id, text=chunk, index=i)
-                
-                # Relate previous chunk if exists
-                if i > 0:
-                    session.run("""
-                        MATCH (m1:Memory {text: $prev_text})
-                        MATCH (m2:Memory {text: $curr_text})
-                        MERGE (m1)-[:NEXT]->(m2)
-                    """, prev_text=chunks[i-1], curr_text=chunk)
+                    UNWIND $pairs AS pair
+                    MATCH (m1:Memory {text: pair.prev})
+                    MATCH (m2:Memory {text: pair.curr})
+                    MERGE (m1)-[:NEXT]->(m2)
+                """, pairs=pairs)
                     
         logger.info(f"Added document {doc_id} with {len(chunks)} chunks to {'conversation ' + str(conversation_id) if conversation_id else 'project'}")
         return {"chunks": len(chunks), "doc_id": doc_id}
@@ -290,9 +435,17 @@ class MemoryService:
                 logger.warning(f"Vector search failed: {e}")
                 return []
     
+        # Score semantics depend on the live index: stores built by
+        # _new_vector_store use inner product on normalized vectors (cosine,
+        # higher = better), but a legacy index loaded from disk is still
+        # IndexFlatL2 and returns distances (lower = better). Branch on the
+        # index metric so ranking and percentages match what
+        # similarity_search_with_score actually returned.
+        l2_scores = self.vector_store.index.metric_type == faiss.METRIC_L2
+
         # Strategy 1: Direct semantic search
         results = search_with_query(query)
-        
+
         # Strategy 2: Typo correction (simplified from source)
         if not results or len(results) < k:
             typo_fixes = {
@@ -350,28 +503,41 @@ class MemoryService:
                             if text not in existing_texts:
                                 # Create dummy Document/score for consistency
                                 doc = Document(page_content=text, metadata={"source": record.get("source", "unknown"), "timestamp": str(record.get("timestamp", ""))})
-                                # Assign a low score (high distance) or neutral
-                                score = 0.5 
+                                # Worst possible score for the live metric, so
+                                # fallback rows only fill slots the scored
+                                # strategies left open and never displace a
+                                # genuine semantic hit in the heap below
+                                score = float('inf') if l2_scores else float('-inf')
                                 results.append((doc, score))
                                 existing_texts.add(text)
 
-        # Truncate to k
-        results = results[:k]
-        
-        memories = []
-        for doc, score in results:
-            # FAISS L2 distance: lower is better. Convert to approx percentage (0-100)
-            similarity = 1 / (1 + score)
-            match_percentage = int(similarity * 100)
-            
-            memories.append({
+        # Keep the k best-scoring results across all strategies with a bounded
+        # heap (O(n log k)) instead of positional truncation, which could drop
+        # a better semantic hit in favor of a later keyword fallback
+        if l2_scores:
+            results = heapq.nsmallest(k, results, key=lambda pair: pair[1])
+        else:
+            results = heapq.nlargest(k, results, key=lambda pair: pair[1])
+
+        if not results:
+            return []
+
+        # Convert scores to percentages in one vectorized pass
+        scores = np.asarray([score for _, score in results], dtype=np.float64)
+        if l2_scores:
+            match_percentages = (100.0 / (1.0 + scores)).astype(np.int64)
+        else:
+            match_percentages = (np.clip(scores, 0.0, 1.0) * 100.0).astype(np.int64)
+
+        return [
+            {
                 "text": doc.page_content,
                 "metadata": doc.metadata,
                 "score": float(score),
-                "match_percentage": match_percentage
-            })
-            
-        return memories
+                "match_percentage": int(match_percentage)
+            }
+            for (doc, score), match_percentage in zip(results, match_percentages)
+        ]
 
     def get_recent_memories(self, user_id: str, project_id: str, conversation_id: str = None, limit: int = 10) -> List[Dict]:
         """
@@ -494,7 +660,8 @@ class MemoryService:
         texts = [r["text"] for r in records]
         metadatas = [{"user_id": r["user_id"], "project_id": r.get("project_id", "default"), "source": r["source"]} for r in records]
         
-        self.vector_store = FAISS.from_texts(texts, self.embeddings, metadatas=metadatas)
+        self.vector_store = self._new_vector_store(len(texts))
+        self.vector_store.add_texts(texts, metadatas=metadatas)
         self._save_vector_store()
         
         logger.info("Cleared project memories and rebuilt index")